@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import boto3
 import json
@@ -17,64 +18,47 @@ def convert_findings_to_serializable(findings):
     """Convert GuardDuty findings to JSON serializable format"""
     return json.loads(json.dumps(findings, default=serialize_datetime))
 
-def lambda_handler(event, context):
-    """Function to get GuardDuty findings with multi-region support.
+def validate_event(event):
+    """Return (detector_id, finding_region, finding_ids) or raise ValueError"""
+    detector_id = event.get('DetectorId')
+    finding_region = event.get('FindingRegion')
+    finding_ids = event.get('FindingIds')
 
-    Parameters
-    ----------
-    event : dict
-        Event payload containing:
-        - DetectorId: GuardDuty detector ID
-        - FindingRegion: AWS region where the finding is located
-        - FindingIds: List of finding IDs to retrieve
+    if not detector_id:
+        raise ValueError("DetectorId is required")
+    if not finding_region:
+        raise ValueError("FindingRegion is required")
+    if not finding_ids or not isinstance(finding_ids, list):
+        raise ValueError("FindingIds must be a non-empty list")
 
-    Returns
-    ------
-        dict: Object containing the GuardDuty findings
-    """
-    logger.info("Received event: %s", event)
-    
-    try:
-        detector_id = event.get('DetectorId')
-        finding_region = event.get('FindingRegion')
-        finding_ids = event.get('FindingIds')
-        
-        if not detector_id:
-            raise ValueError("DetectorId is required")
-        if not finding_region:
-            raise ValueError("FindingRegion is required")
-        if not finding_ids or not isinstance(finding_ids, list):
-            raise ValueError("FindingIds must be a non-empty list")
-        
-        logger.info(f"Getting findings for detector {detector_id} in region {finding_region}")
-        logger.info(f"Finding IDs: {finding_ids}")
-        
-        guardduty_client = boto3.client('guardduty', region_name=finding_region)
-        
-        response = guardduty_client.get_findings(
-            DetectorId=detector_id,
-            FindingIds=finding_ids
-        )
-        
-        logger.info(f"Successfully retrieved {len(response.get('Findings', []))} findings")
-        
-        findings = response.get('Findings', [])
-        serializable_findings = convert_findings_to_serializable(findings)
-        
-        # Return findings in the same format as GuardDuty API response
-        return {
-            'Findings': serializable_findings
-        }
-        
-    except ValueError as e:
+    logger.info(f"Getting findings for detector {detector_id} in region {finding_region}")
+    logger.info(f"Finding IDs: {finding_ids}")
+
+    return detector_id, finding_region, finding_ids
+
+def build_response(response):
+    """Build the handler result from a GuardDuty GetFindings response"""
+    logger.info(f"Successfully retrieved {len(response.get('Findings', []))} findings")
+
+    findings = response.get('Findings', [])
+    serializable_findings = convert_findings_to_serializable(findings)
+
+    # Return findings in the same format as GuardDuty API response
+    return {
+        'Findings': serializable_findings
+    }
+
+def build_error_response(e):
+    """Map an exception raised while getting findings to the handler error result"""
+    if isinstance(e, ValueError):
         logger.error(f"Validation error: {str(e)}")
         return {
             'statusCode': 400,
             'error': 'ValidationError',
             'message': str(e)
         }
-    
-    except ClientError as e:
+
+    if isinstance(e, ClientError):
         error_code = e.response['Error']['Code']
         error_message = e.response['Error']['Message']
         logger.error(f"AWS ClientError: {error_code} - {error_message}")
@@ -83,19 +67,94 @@ def lambda_handler(event, context):
             'error': error_code,
             'message': error_message
         }
-    
-    except BotoCoreError as e:
+
+    if isinstance(e, BotoCoreError):
         logger.error(f"BotoCore error: {str(e)}")
         return {
             'statusCode': 500,
             'error': 'BotoCoreError',
             'message': str(e)
         }
-    
+
+    logger.error(f"Unexpected error: {str(e)}")
+    return {
+        'statusCode': 500,
+        'error': 'UnexpectedError',
+        'message': str(e)
+    }
+
+def lambda_handler(event, context):
+    """Function to get GuardDuty findings with multi-region support.
+
+    Parameters
+    ----------
+    event : dict
+        Event payload containing:
+        - DetectorId: GuardDuty detector ID
+        - FindingRegion: AWS region where the finding is located
+        - FindingIds: List of finding IDs to retrieve
+
+    Returns
+    ------
+        dict: Object containing the GuardDuty findings
+    """
+    logger.info("Received event: %s", event)
+
+    try:
+        detector_id, finding_region, finding_ids = validate_event(event)
+
+        guardduty_client = boto3.client('guardduty', region_name=finding_region)
+
+        response = guardduty_client.get_findings(
+            DetectorId=detector_id,
+            FindingIds=finding_ids
+        )
+
+        return build_response(response)
+
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
-        return {
-            'statusCode': 500,
-            'error': 'UnexpectedError',
-            'message': str(e)
-        }
+        return build_error_response(e)
+
+async def lambda_handler_async(event, context=None, guardduty_client=None, executor=None):
+    """Asyncio variant of lambda_handler for batch callers.
+
+    The blocking GetFindings call runs on ``executor`` (the loop's default
+    executor when None) so many findings can be fetched concurrently. The
+    result is identical to ``lambda_handler`` for the same event.
+
+    Parameters
+    ----------
+    event : dict
+        Same payload as lambda_handler
+    context : object
+        Unused, accepted for signature parity with lambda_handler
+    guardduty_client : botocore.client.GuardDuty
+        Client for FindingRegion to reuse across calls; created when None
+    executor : concurrent.futures.Executor
+        Executor used for the blocking GuardDuty call
+
+    Returns
+    ------
+        dict: Object containing the GuardDuty findings
+    """
+    logger.info("Received event: %s", event)
+
+    try:
+        detector_id, finding_region, finding_ids = validate_event(event)
+
+        if guardduty_client is None:
+            guardduty_client = boto3.client('guardduty', region_name=finding_region)
+
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(
+            executor,
+            lambda: guardduty_client.get_findings(
+                DetectorId=detector_id,
+                FindingIds=finding_ids
+            )
+        )
+
+        return build_response(response)
+
+    except Exception as e:
+        return build_error_response(e)
@@ -1,3 +1,4 @@
+import asyncio
 import pytest
 from unittest.mock import patch, MagicMock
 import json
@@ -9,7 +10,7 @@ import os
 # Add the current directory to Python path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app import lambda_handler, serialize_datetime, convert_findings_to_serializable
+from app import lambda_handler, lambda_handler_async, serialize_datetime, convert_findings_to_serializable
 
 
 @pytest.fixture
@@ -277,3 +278,55 @@ class TestLambdaHandlerErrors:
         assert result['statusCode'] == 500
         assert result['error'] == 'UnexpectedError'
         assert result['message'] == 'Unexpected error occurred'
+
+
+class TestLambdaHandlerAsync:
+    """Test the asyncio variant matches the synchronous handler"""
+
+    @patch('app.boto3.client')
+    def test_lambda_handler_async_matches_sync(self, mock_boto3_client, valid_event, mock_guardduty_response):
+        """Test async handler returns the same result as lambda_handler"""
+        mock_client = MagicMock()
+        mock_client.get_findings.return_value = mock_guardduty_response
+        mock_boto3_client.return_value = mock_client
+
+        result = asyncio.run(lambda_handler_async(valid_event, {}))
+
+        assert result == lambda_handler(valid_event, {})
+        mock_boto3_client.assert_called_with('guardduty', region_name='us-east-1')
+        mock_client.get_findings.assert_called_with(
+            DetectorId='test-detector-123',
+            FindingIds=['finding-1', 'finding-2']
+        )
+
+    @patch('app.boto3.client')
+    def test_lambda_handler_async_reuses_client(self, mock_boto3_client, valid_event, mock_guardduty_response):
+        """Test async handler uses a supplied client instead of creating one"""
+        mock_client = MagicMock()
+        mock_client.get_findings.return_value = mock_guardduty_response
+
+        result = asyncio.run(lambda_handler_async(valid_event, guardduty_client=mock_client))
+
+        assert result['Findings'][0]['CreatedAt'] == '2023-10-09T12:00:00'
+        mock_boto3_client.assert_not_called()
+
+    def test_lambda_handler_async_validation_error(self):
+        """Test async handler validation errors match lambda_handler"""
+        event = {'FindingRegion': 'us-east-1', 'FindingIds': ['finding-1']}
+
+        assert asyncio.run(lambda_handler_async(event)) == lambda_handler(event, {})
+
+    @pytest.mark.parametrize('error', [
+        ClientError({'Error': {'Code': 'DetectorNotFound', 'Message': 'The detector does not exist'}}, 'GetFindings'),
+        BotoCoreError(),
+        Exception('Unexpected error occurred'),
+    ])
+    def test_lambda_handler_async_errors_match_sync(self, valid_event, error):
+        """Test async handler error results match lambda_handler"""
+        mock_client = MagicMock()
+        mock_client.get_findings.side_effect = error
+
+        with patch('app.boto3.client', return_value=mock_client):
+            expected = lambda_handler(valid_event, {})
+
+        assert asyncio.run(lambda_handler_async(valid_event, guardduty_client=mock_client)) == expected
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import boto3
 import json
@@ -6,6 +7,49 @@ from botocore.exceptions import BotoCoreError, ClientError
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+def create_client(region):
+    """Create a GuardDuty client for the region, or the current region when empty"""
+    if region:
+        return boto3.client('guardduty', region_name=region)
+    return boto3.client('guardduty')
+
+def build_response(response):
+    """Build the handler result from a GuardDuty ListDetectors response"""
+    detector_ids = response.get('DetectorIds', [])
+    logger.info(f"Successfully retrieved {len(detector_ids)} detectors")
+
+    # Return detector IDs in the same format as GuardDuty API response
+    return {
+        'DetectorIds': detector_ids
+    }
+
+def build_error_response(e):
+    """Map an exception raised while listing detectors to the handler error result"""
+    if isinstance(e, ClientError):
+        error_code = e.response['Error']['Code']
+        error_message = e.response['Error']['Message']
+        logger.error(f"AWS ClientError: {error_code} - {error_message}")
+        return {
+            'statusCode': 500,
+            'error': error_code,
+            'message': error_message
+        }
+
+    if isinstance(e, BotoCoreError):
+        logger.error(f"BotoCore error: {str(e)}")
+        return {
+            'statusCode': 500,
+            'error': 'BotoCoreError',
+            'message': str(e)
+        }
+
+    logger.error(f"Unexpected error: {str(e)}")
+    return {
+        'statusCode': 500,
+        'error': 'UnexpectedError',
+        'message': str(e)
+    }
+
 def lambda_handler(event, context):
     """Function to list GuardDuty detectors with multi-region support.
 
@@ -20,49 +64,57 @@ def lambda_handler(event, context):
         dict: Object containing the GuardDuty detector IDs
     """
     logger.info("Received event: %s", event)
-    
+
     try:
         region = event.get('FindingRegion')
-        
+
         logger.info(f"Listing detectors in region: {region or 'current region'}")
-        
-        if region:
-            guardduty_client = boto3.client('guardduty', region_name=region)
-        else:
-            guardduty_client = boto3.client('guardduty')
-        
+
+        guardduty_client = create_client(region)
+
         response = guardduty_client.list_detectors()
-        
-        detector_ids = response.get('DetectorIds', [])
-        logger.info(f"Successfully retrieved {len(detector_ids)} detectors")
-        
-        # Return detector IDs in the same format as GuardDuty API response
-        return {
-            'DetectorIds': detector_ids
-        }
-        
-    except ClientError as e:
-        error_code = e.response['Error']['Code']
-        error_message = e.response['Error']['Message']
-        logger.error(f"AWS ClientError: {error_code} - {error_message}")
-        return {
-            'statusCode': 500,
-            'error': error_code,
-            'message': error_message
-        }
-    
-    except BotoCoreError as e:
-        logger.error(f"BotoCore error: {str(e)}")
-        return {
-            'statusCode': 500,
-            'error': 'BotoCoreError',
-            'message': str(e)
-        }
-    
+
+        return build_response(response)
+
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
-        return {
-            'statusCode': 500,
-            'error': 'UnexpectedError',
-            'message': str(e)
-        }
+        return build_error_response(e)
+
+async def lambda_handler_async(event, context=None, guardduty_client=None, executor=None):
+    """Asyncio variant of lambda_handler for batch callers.
+
+    The blocking ListDetectors call runs on ``executor`` (the loop's default
+    executor when None). The result is identical to ``lambda_handler`` for
+    the same event.
+
+    Parameters
+    ----------
+    event : dict
+        Same payload as lambda_handler
+    context : object
+        Unused, accepted for signature parity with lambda_handler
+    guardduty_client : botocore.client.GuardDuty
+        Client for FindingRegion to reuse across calls; created when None
+    executor : concurrent.futures.Executor
+        Executor used for the blocking GuardDuty call
+
+    Returns
+    ------
+        dict: Object containing the GuardDuty detector IDs
+    """
+    logger.info("Received event: %s", event)
+
+    try:
+        region = event.get('FindingRegion')
+
+        logger.info(f"Listing detectors in region: {region or 'current region'}")
+
+        if guardduty_client is None:
+            guardduty_client = create_client(region)
+
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(executor, guardduty_client.list_detectors)
+
+        return build_response(response)
+
+    except Exception as e:
+        return build_error_response(e)
@@ -1,6 +1,8 @@
+import asyncio
 import pytest
 from unittest.mock import patch, MagicMock
 import json
+import logging
 from botocore.exceptions import ClientError, BotoCoreError
 import sys
 import os
@@ -8,7 +10,7 @@ import os
 # Add the current directory to Python path for imports
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app import lambda_handler
+from app import lambda_handler, lambda_handler_async
 
 
 class TestGuardDutyListDetectors:
@@ -231,3 +233,57 @@ class TestGuardDutyListDetectors:
         mock_guardduty_client.list_detectors.assert_called_once()
 
 
+class TestGuardDutyListDetectorsAsync:
+    """Test class for the asyncio variant of the List Detectors handler."""
+
+    @patch('app.boto3.client')
+    @pytest.mark.parametrize('event', [{'FindingRegion': 'us-west-2'}, {}])
+    def test_lambda_handler_async_matches_sync(self, mock_boto3_client, event):
+        """Test async handler returns the same result as lambda_handler."""
+        mock_guardduty_client = MagicMock()
+        mock_boto3_client.return_value = mock_guardduty_client
+        mock_guardduty_client.list_detectors.return_value = {
+            'DetectorIds': ['detector-id-1']
+        }
+
+        result = asyncio.run(lambda_handler_async(event, {}))
+
+        assert result == lambda_handler(event, {})
+        assert mock_boto3_client.call_args_list[0] == mock_boto3_client.call_args_list[1]
+
+    @patch('app.boto3.client')
+    def test_lambda_handler_async_reuses_client(self, mock_boto3_client):
+        """Test async handler uses a supplied client instead of creating one."""
+        mock_guardduty_client = MagicMock()
+        mock_guardduty_client.list_detectors.return_value = {}
+
+        result = asyncio.run(lambda_handler_async({'FindingRegion': 'us-west-2'}, guardduty_client=mock_guardduty_client))
+
+        assert result == {'DetectorIds': []}
+        mock_boto3_client.assert_not_called()
+
+    def test_lambda_handler_async_logs_region_with_supplied_client(self, caplog):
+        """Test async handler logs the region like lambda_handler when given a client."""
+        mock_guardduty_client = MagicMock()
+        mock_guardduty_client.list_detectors.return_value = {'DetectorIds': []}
+
+        with caplog.at_level(logging.INFO):
+            asyncio.run(lambda_handler_async({'FindingRegion': 'us-west-2'}, guardduty_client=mock_guardduty_client))
+
+        assert 'Listing detectors in region: us-west-2' in caplog.text
+
+    @pytest.mark.parametrize('error', [
+        ClientError({'Error': {'Code': 'AccessDenied', 'Message': 'Access denied'}}, 'ListDetectors'),
+        BotoCoreError(),
+        Exception('Unexpected error occurred'),
+    ])
+    def test_lambda_handler_async_errors_match_sync(self, error):
+        """Test async handler error results match lambda_handler."""
+        mock_guardduty_client = MagicMock()
+        mock_guardduty_client.list_detectors.side_effect = error
+        event = {'FindingRegion': 'us-east-1'}
+
+        with patch('app.boto3.client', return_value=mock_guardduty_client):
+            expected = lambda_handler(event, {})
+
+        assert asyncio.run(lambda_handler_async(event, guardduty_client=mock_guardduty_client)) == expected
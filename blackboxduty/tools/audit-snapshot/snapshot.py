@@ -0,0 +1,366 @@
+import argparse
+import json
+import logging
+import sqlite3
+import sys
+from datetime import datetime, timedelta, timezone
+import boto3
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.exceptions import BotoCoreError, ClientError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TABLE_NAME = 'BlackBoxDutyTable'
+HIGH_WATER_MARK_KEY = 'EventTimeHighWaterMark'
+
+# EventTime is the EventBridge event time, not the time the state machine wrote
+# the item. Items can land well after their EventTime (GetFindings and
+# ListDetectors each retry 5 times with 15s x 1.5 backoff, and executions
+# overlap), so incremental syncs re-read a window before the mark. The Scan
+# reads the whole table regardless of the filter, so the window costs no reads.
+SYNC_LOOKBACK = timedelta(minutes=30)
+
+# Metadata attributes copied verbatim from the BlackBoxDuty DynamoDB table
+# (see "Prepare DynamoDB Item" in statemachine/blackboxduty.asl.json).
+STRING_COLUMNS = (
+    'Id',
+    'EventID',
+    'EventTime',
+    'FindingHash',
+    'FindingArn',
+    'FindingType',
+    'FindingTitle',
+    'FindingDescription',
+    'FindingCreatedAt',
+    'FindingStatus',
+    'FindingSeverity',
+    'SecurityHubObjURI',
+    'SecurityHubObjVersionId',
+    'SecurityHubObjETag',
+    'GuardDutyObjURI',
+    'GuardDutyObjVersionId',
+    'GuardDutyObjETag',
+    'GuardDutyObj',
+)
+COLUMNS = STRING_COLUMNS + ('FindingNote', 'ResourceType')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS findings (
+    Id TEXT NOT NULL,
+    EventID TEXT NOT NULL,
+    EventTime TEXT,
+    FindingHash TEXT,
+    FindingArn TEXT,
+    FindingType TEXT,
+    FindingTitle TEXT,
+    FindingDescription TEXT,
+    FindingCreatedAt TEXT,
+    FindingStatus TEXT,
+    FindingSeverity TEXT,
+    SecurityHubObjURI TEXT,
+    SecurityHubObjVersionId TEXT,
+    SecurityHubObjETag TEXT,
+    GuardDutyObjURI TEXT,
+    GuardDutyObjVersionId TEXT,
+    GuardDutyObjETag TEXT,
+    GuardDutyObj TEXT,
+    FindingNote TEXT,
+    ResourceType TEXT,
+    PRIMARY KEY (Id, EventID)
+);
+
+CREATE INDEX IF NOT EXISTS findings_event_time ON findings (EventTime);
+CREATE INDEX IF NOT EXISTS findings_severity ON findings (FindingSeverity, EventTime);
+CREATE INDEX IF NOT EXISTS findings_type ON findings (FindingType, EventTime);
+CREATE INDEX IF NOT EXISTS findings_resource ON findings (ResourceType, EventTime);
+CREATE INDEX IF NOT EXISTS findings_finding_arn ON findings (FindingArn);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS findings_fts USING fts5(
+    FindingTitle,
+    FindingDescription,
+    content='findings',
+    content_rowid='rowid'
+);
+
+CREATE TRIGGER IF NOT EXISTS findings_fts_insert AFTER INSERT ON findings BEGIN
+    INSERT INTO findings_fts (rowid, FindingTitle, FindingDescription)
+    VALUES (new.rowid, new.FindingTitle, new.FindingDescription);
+END;
+
+CREATE TRIGGER IF NOT EXISTS findings_fts_delete AFTER DELETE ON findings BEGIN
+    INSERT INTO findings_fts (findings_fts, rowid, FindingTitle, FindingDescription)
+    VALUES ('delete', old.rowid, old.FindingTitle, old.FindingDescription);
+END;
+
+CREATE TRIGGER IF NOT EXISTS findings_fts_update AFTER UPDATE ON findings BEGIN
+    INSERT INTO findings_fts (findings_fts, rowid, FindingTitle, FindingDescription)
+    VALUES ('delete', old.rowid, old.FindingTitle, old.FindingDescription);
+    INSERT INTO findings_fts (rowid, FindingTitle, FindingDescription)
+    VALUES (new.rowid, new.FindingTitle, new.FindingDescription);
+END;
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    Key TEXT PRIMARY KEY,
+    Value TEXT
+);
+"""
+
+UPSERT_SQL = (
+    f"INSERT INTO findings ({', '.join(COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in COLUMNS)}) "
+    f"ON CONFLICT (Id, EventID) DO UPDATE SET "
+    + ', '.join(f"{column} = excluded.{column}" for column in COLUMNS if column not in ('Id', 'EventID'))
+)
+
+_deserializer = TypeDeserializer()
+
+
+def open_snapshot(path):
+    """Open (and create if needed) the SQLite snapshot at the given path"""
+    connection = sqlite3.connect(path)
+    connection.row_factory = sqlite3.Row
+    connection.execute('PRAGMA journal_mode = WAL')
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def get_high_water_mark(connection):
+    """Return the newest EventTime synced into the snapshot, or None"""
+    row = connection.execute(
+        'SELECT Value FROM sync_state WHERE Key = ?', (HIGH_WATER_MARK_KEY,)
+    ).fetchone()
+    return row['Value'] if row else None
+
+
+def set_high_water_mark(connection, event_time):
+    """Persist the newest EventTime synced into the snapshot"""
+    connection.execute(
+        'INSERT INTO sync_state (Key, Value) VALUES (?, ?) '
+        'ON CONFLICT (Key) DO UPDATE SET Value = excluded.Value',
+        (HIGH_WATER_MARK_KEY, event_time)
+    )
+
+
+def lookback_from(high_water_mark, lookback=SYNC_LOOKBACK):
+    """Return the EventTime to filter from: the high-water mark minus the lookback window"""
+    try:
+        mark = datetime.fromisoformat(high_water_mark.replace('Z', '+00:00'))
+    except ValueError:
+        logger.warning(f"Could not parse high-water mark {high_water_mark}, syncing without lookback")
+        return high_water_mark
+    if mark.tzinfo is None:
+        mark = mark.replace(tzinfo=timezone.utc)
+    return (mark - lookback).astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+def extract_resource_type(guardduty_obj):
+    """Return Resource.ResourceType from the stored GuardDuty finding JSON, if present"""
+    if not guardduty_obj:
+        return None
+    try:
+        return json.loads(guardduty_obj).get('Resource', {}).get('ResourceType')
+    except (ValueError, AttributeError):
+        return None
+
+
+def item_to_row(item):
+    """Convert a low-level DynamoDB item into a tuple ordered as COLUMNS"""
+    record = {key: _deserializer.deserialize(value) for key, value in item.items()}
+    row = [record.get(column) for column in STRING_COLUMNS]
+    note = record.get('FindingNote')
+    row.append(json.dumps(note, default=str) if note else None)
+    row.append(extract_resource_type(record.get('GuardDutyObj')))
+    return tuple(row)
+
+
+def scan_items(dynamodb_client, table_name, since=None):
+    """Yield table items, filtered server-side to EventTime >= since when given.
+
+    ``>=`` rather than ``>`` so that items sharing the high-water mark timestamp
+    but written after the previous sync are not missed; upserts keep this idempotent.
+    """
+    params = {'TableName': table_name}
+    if since:
+        params['FilterExpression'] = '#t >= :since'
+        params['ExpressionAttributeNames'] = {'#t': 'EventTime'}
+        params['ExpressionAttributeValues'] = {':since': {'S': since}}
+
+    paginator = dynamodb_client.get_paginator('scan')
+    for page in paginator.paginate(**params):
+        yield from page.get('Items', [])
+
+
+def sync_snapshot(connection, dynamodb_client, table_name=DEFAULT_TABLE_NAME, full=False, batch_size=500,
+                  lookback=SYNC_LOOKBACK):
+    """Incrementally sync BlackBoxDuty metadata from DynamoDB into the snapshot.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        Snapshot opened with ``open_snapshot``
+    dynamodb_client : botocore.client.DynamoDB
+        Low-level DynamoDB client
+    table_name : str
+        Name of the BlackBoxDuty DynamoDB table
+    full : bool
+        Ignore the stored high-water mark and re-read the whole table
+    batch_size : int
+        Number of rows written per SQLite transaction
+    lookback : datetime.timedelta
+        Window before the high-water mark that is re-read to pick up items
+        written after their EventTime
+
+    Returns
+    ------
+        dict: Number of items synced and the resulting high-water mark
+    """
+    stored_mark = None if full else get_high_water_mark(connection)
+    since = lookback_from(stored_mark, lookback) if stored_mark else None
+    logger.info(f"Syncing {table_name} into snapshot since {since or 'the beginning'}")
+
+    high_water_mark = stored_mark
+    synced = 0
+    batch = []
+
+    def flush():
+        with connection:
+            connection.executemany(UPSERT_SQL, batch)
+        batch.clear()
+
+    for item in scan_items(dynamodb_client, table_name, since):
+        row = item_to_row(item)
+        event_time = row[COLUMNS.index('EventTime')]
+        if event_time and (high_water_mark is None or event_time > high_water_mark):
+            high_water_mark = event_time
+        batch.append(row)
+        synced += 1
+        if len(batch) >= batch_size:
+            flush()
+
+    # Scan order is not time order, so the mark only advances once the scan completes.
+    with connection:
+        connection.executemany(UPSERT_SQL, batch)
+        if high_water_mark:
+            set_high_water_mark(connection, high_water_mark)
+
+    logger.info(f"Synced {synced} items, high-water mark is now {high_water_mark}")
+    return {
+        'Synced': synced,
+        'HighWaterMark': high_water_mark
+    }
+
+
+def search_findings(connection, text=None, since=None, until=None, severity=None,
+                    finding_type=None, resource_type=None, limit=50):
+    """Search the snapshot, newest first.
+
+    ``text`` is an FTS5 query matched against FindingTitle and FindingDescription;
+    every other filter is served by a B-tree index on the findings table.
+    """
+    clauses = []
+    params = []
+
+    if text:
+        clauses.append('f.rowid IN (SELECT rowid FROM findings_fts WHERE findings_fts MATCH ?)')
+        params.append(text)
+    if since:
+        clauses.append('f.EventTime >= ?')
+        params.append(since)
+    if until:
+        clauses.append('f.EventTime < ?')
+        params.append(until)
+    if severity:
+        clauses.append('f.FindingSeverity = ?')
+        params.append(severity)
+    if finding_type:
+        clauses.append('f.FindingType = ?')
+        params.append(finding_type)
+    if resource_type:
+        clauses.append('f.ResourceType = ?')
+        params.append(resource_type)
+
+    sql = 'SELECT f.* FROM findings f'
+    if clauses:
+        sql += ' WHERE ' + ' AND '.join(clauses)
+    sql += ' ORDER BY f.EventTime DESC LIMIT ?'
+    params.append(limit)
+
+    return [dict(row) for row in connection.execute(sql, params)]
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description='Build and query an offline SQLite snapshot of the BlackBoxDuty DynamoDB table.'
+    )
+    parser.add_argument('--db', default='blackboxduty-audit.db', help='Path to the SQLite snapshot')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    sync_parser = subparsers.add_parser('sync', help='Sync new findings metadata from DynamoDB')
+    sync_parser.add_argument('--table', default=DEFAULT_TABLE_NAME, help='BlackBoxDuty DynamoDB table name')
+    sync_parser.add_argument('--region', help='AWS region of the DynamoDB table')
+    sync_parser.add_argument('--profile', help='AWS profile to use')
+    sync_parser.add_argument('--full', action='store_true', help='Ignore the high-water mark and re-read the table')
+
+    search_parser = subparsers.add_parser('search', help='Search the local snapshot')
+    search_parser.add_argument('text', nargs='?', help='FTS5 query over FindingTitle and FindingDescription')
+    search_parser.add_argument('--since', help='Only findings with EventTime >= this ISO 8601 timestamp')
+    search_parser.add_argument('--until', help='Only findings with EventTime < this ISO 8601 timestamp')
+    search_parser.add_argument('--severity', help='FindingSeverity label, e.g. HIGH')
+    search_parser.add_argument('--type', dest='finding_type', help='FindingType, e.g. TTPs/Discovery/...')
+    search_parser.add_argument('--resource-type', help='GuardDuty Resource.ResourceType, e.g. Instance')
+    search_parser.add_argument('--limit', type=int, default=50, help='Maximum number of results')
+    search_parser.add_argument('--json', action='store_true', help='Print full rows as JSON lines')
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+    args = parse_args(argv)
+    connection = open_snapshot(args.db)
+
+    try:
+        if args.command == 'sync':
+            session = boto3.Session(profile_name=args.profile, region_name=args.region)
+            result = sync_snapshot(connection, session.client('dynamodb'), args.table, full=args.full)
+            print(json.dumps(result))
+            return 0
+
+        rows = search_findings(
+            connection,
+            text=args.text,
+            since=args.since,
+            until=args.until,
+            severity=args.severity,
+            finding_type=args.finding_type,
+            resource_type=args.resource_type,
+            limit=args.limit
+        )
+        for row in rows:
+            if args.json:
+                print(json.dumps(row))
+            else:
+                print('\t'.join(str(row[column] or '') for column in
+                                ('EventTime', 'FindingSeverity', 'FindingType', 'FindingTitle', 'Id')))
+        return 0
+
+    except sqlite3.OperationalError as e:
+        logger.error(f"SQLite error: {str(e)}")
+        return 1
+
+    except ClientError as e:
+        error_code = e.response['Error']['Code']
+        error_message = e.response['Error']['Message']
+        logger.error(f"AWS ClientError: {error_code} - {error_message}")
+        return 1
+
+    except BotoCoreError as e:
+        logger.error(f"BotoCore error: {str(e)}")
+        return 1
+
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
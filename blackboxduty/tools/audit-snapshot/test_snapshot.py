@@ -0,0 +1,259 @@
+import pytest
+from unittest.mock import patch, MagicMock
+import json
+from botocore.exceptions import ClientError
+import sys
+import os
+
+# Add the current directory to Python path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from snapshot import (
+    open_snapshot,
+    get_high_water_mark,
+    item_to_row,
+    sync_snapshot,
+    search_findings,
+    main,
+    COLUMNS,
+)
+
+
+def make_item(event_id, event_time, title, description, severity='HIGH',
+              finding_type='Recon:EC2/PortProbeUnprotectedPort', resource_type='Instance'):
+    """Build a low-level DynamoDB item shaped like the state machine's PutItem"""
+    return {
+        'Id': {'S': f'arn:aws:securityhub:us-east-1::product/aws/guardduty/finding/{event_id}'},
+        'EventID': {'S': event_id},
+        'EventTime': {'S': event_time},
+        'FindingHash': {'S': f'hash-{event_id}'},
+        'FindingTitle': {'S': title},
+        'FindingDescription': {'S': description},
+        'FindingSeverity': {'S': severity},
+        'FindingType': {'S': finding_type},
+        'FindingStatus': {'S': 'NEW'},
+        'FindingNote': {'M': {}},
+        'GuardDutyObj': {'S': json.dumps({'Resource': {'ResourceType': resource_type}})},
+    }
+
+
+@pytest.fixture
+def connection():
+    """Fixture for an in-memory snapshot"""
+    connection = open_snapshot(':memory:')
+    yield connection
+    connection.close()
+
+
+@pytest.fixture
+def sample_items():
+    """Fixture for sample BlackBoxDuty table items"""
+    return [
+        make_item('event-1', '2025-01-01T00:00:00Z', 'Port scan detected',
+                  'Unprotected port on EC2 instance is being probed.'),
+        make_item('event-2', '2025-02-01T00:00:00Z', 'Credential exfiltration',
+                  'Credentials were used from an external IP address.', severity='CRITICAL',
+                  finding_type='UnauthorizedAccess:IAMUser/InstanceCredentialExfiltration.OutsideAWS',
+                  resource_type='AccessKey'),
+        make_item('event-3', '2025-03-01T00:00:00Z', 'Bitcoin mining',
+                  'EC2 instance is querying a domain associated with Bitcoin.', severity='MEDIUM',
+                  finding_type='CryptoCurrency:EC2/BitcoinTool.B!DNS'),
+    ]
+
+
+def mock_dynamodb_client(*pages):
+    """Return a mock DynamoDB client whose scan paginator yields the given pages"""
+    mock_client = MagicMock()
+    mock_client.get_paginator.return_value.paginate.return_value = [{'Items': items} for items in pages]
+    return mock_client
+
+
+class TestItemConversion:
+    """Test DynamoDB item conversion"""
+
+    def test_item_to_row(self, sample_items):
+        """Test item conversion to an ordered row"""
+        row = dict(zip(COLUMNS, item_to_row(sample_items[1])))
+
+        assert row['EventID'] == 'event-2'
+        assert row['FindingSeverity'] == 'CRITICAL'
+        assert row['ResourceType'] == 'AccessKey'
+        assert row['FindingNote'] is None
+        assert row['FindingArn'] is None
+
+    def test_item_to_row_invalid_guardduty_obj(self, sample_items):
+        """Test item conversion when GuardDutyObj is not valid JSON"""
+        item = sample_items[0]
+        item['GuardDutyObj'] = {'S': 'not json'}
+
+        row = dict(zip(COLUMNS, item_to_row(item)))
+
+        assert row['ResourceType'] is None
+
+
+class TestSyncSnapshot:
+    """Test incremental sync from DynamoDB"""
+
+    def test_sync_snapshot_initial(self, connection, sample_items):
+        """Test the first sync performs an unfiltered scan"""
+        mock_client = mock_dynamodb_client(sample_items[:2], sample_items[2:])
+
+        result = sync_snapshot(connection, mock_client, 'BlackBoxDutyTable')
+
+        assert result == {'Synced': 3, 'HighWaterMark': '2025-03-01T00:00:00Z'}
+        assert get_high_water_mark(connection) == '2025-03-01T00:00:00Z'
+        mock_client.get_paginator.assert_called_once_with('scan')
+        mock_client.get_paginator.return_value.paginate.assert_called_once_with(TableName='BlackBoxDutyTable')
+
+    def test_sync_snapshot_incremental(self, connection, sample_items):
+        """Test subsequent syncs filter on the stored high-water mark"""
+        sync_snapshot(connection, mock_dynamodb_client(sample_items[:2]), 'BlackBoxDutyTable')
+        mock_client = mock_dynamodb_client(sample_items[1:])
+
+        result = sync_snapshot(connection, mock_client, 'BlackBoxDutyTable')
+
+        assert result == {'Synced': 2, 'HighWaterMark': '2025-03-01T00:00:00Z'}
+        mock_client.get_paginator.return_value.paginate.assert_called_once_with(
+            TableName='BlackBoxDutyTable',
+            FilterExpression='#t >= :since',
+            ExpressionAttributeNames={'#t': 'EventTime'},
+            ExpressionAttributeValues={':since': {'S': '2025-01-31T23:30:00Z'}}
+        )
+        assert connection.execute('SELECT COUNT(*) FROM findings').fetchone()[0] == 3
+
+    def test_sync_snapshot_late_item_within_lookback(self, connection, sample_items):
+        """Test an item written after a sync but older than the stored mark is still picked up"""
+        sync_snapshot(connection, mock_dynamodb_client(sample_items), 'BlackBoxDutyTable')
+        late = make_item('event-late', '2025-02-28T23:50:00Z', 'Late finding', 'Written after its EventTime.')
+        mock_client = mock_dynamodb_client([late, sample_items[2]])
+
+        result = sync_snapshot(connection, mock_client, 'BlackBoxDutyTable')
+
+        assert result == {'Synced': 2, 'HighWaterMark': '2025-03-01T00:00:00Z'}
+        kwargs = mock_client.get_paginator.return_value.paginate.call_args.kwargs
+        assert kwargs['ExpressionAttributeValues'] == {':since': {'S': '2025-02-28T23:30:00Z'}}
+        assert kwargs['ExpressionAttributeValues'][':since']['S'] <= late['EventTime']['S']
+        assert [row['EventID'] for row in search_findings(connection, text='late')] == ['event-late']
+        assert get_high_water_mark(connection) == '2025-03-01T00:00:00Z'
+
+    def test_sync_snapshot_full(self, connection, sample_items):
+        """Test full sync ignores the stored high-water mark"""
+        sync_snapshot(connection, mock_dynamodb_client(sample_items), 'BlackBoxDutyTable')
+        mock_client = mock_dynamodb_client(sample_items)
+
+        sync_snapshot(connection, mock_client, 'BlackBoxDutyTable', full=True)
+
+        mock_client.get_paginator.return_value.paginate.assert_called_once_with(TableName='BlackBoxDutyTable')
+        assert connection.execute('SELECT COUNT(*) FROM findings').fetchone()[0] == 3
+
+    def test_sync_snapshot_updates_full_text_index(self, connection, sample_items):
+        """Test re-synced items replace their previous full-text entries"""
+        sync_snapshot(connection, mock_dynamodb_client(sample_items), 'BlackBoxDutyTable')
+        updated = make_item('event-1', '2025-01-01T00:00:00Z', 'Port sweep detected', 'Updated description.')
+
+        sync_snapshot(connection, mock_dynamodb_client([updated]), 'BlackBoxDutyTable', batch_size=1)
+
+        assert search_findings(connection, text='scan') == []
+        assert [row['EventID'] for row in search_findings(connection, text='sweep')] == ['event-1']
+
+    def test_sync_snapshot_client_error_keeps_high_water_mark(self, connection, sample_items):
+        """Test a failed scan does not advance the high-water mark"""
+        sync_snapshot(connection, mock_dynamodb_client(sample_items[:1]), 'BlackBoxDutyTable')
+
+        def failing_pages():
+            yield {'Items': sample_items[2:]}
+            raise ClientError(
+                {'Error': {'Code': 'ProvisionedThroughputExceededException', 'Message': 'Throttled'}},
+                'Scan'
+            )
+
+        mock_client = MagicMock()
+        mock_client.get_paginator.return_value.paginate.return_value = failing_pages()
+
+        with pytest.raises(ClientError):
+            sync_snapshot(connection, mock_client, 'BlackBoxDutyTable', batch_size=1)
+
+        assert get_high_water_mark(connection) == '2025-01-01T00:00:00Z'
+
+
+class TestSearchFindings:
+    """Test snapshot queries"""
+
+    @pytest.fixture(autouse=True)
+    def populated(self, connection, sample_items):
+        sync_snapshot(connection, mock_dynamodb_client(sample_items), 'BlackBoxDutyTable')
+
+    def test_search_findings_all_newest_first(self, connection):
+        """Test search without filters returns everything newest first"""
+        result = search_findings(connection)
+
+        assert [row['EventID'] for row in result] == ['event-3', 'event-2', 'event-1']
+
+    @pytest.mark.parametrize('text,expected', [
+        ('port', ['event-1']),
+        ('EC2', ['event-3', 'event-1']),
+        ('credential*', ['event-2']),
+        ('"external IP"', ['event-2']),
+    ])
+    def test_search_findings_full_text(self, connection, text, expected):
+        """Test full-text search over title and description"""
+        result = search_findings(connection, text=text)
+
+        assert [row['EventID'] for row in result] == expected
+
+    def test_search_findings_filters(self, connection):
+        """Test indexed filters combine with full-text search"""
+        assert [row['EventID'] for row in search_findings(connection, severity='CRITICAL')] == ['event-2']
+        assert [row['EventID'] for row in search_findings(connection, resource_type='Instance')] == ['event-3', 'event-1']
+        assert [row['EventID'] for row in search_findings(
+            connection, finding_type='CryptoCurrency:EC2/BitcoinTool.B!DNS')] == ['event-3']
+        assert [row['EventID'] for row in search_findings(
+            connection, text='EC2', since='2025-01-15T00:00:00Z', until='2025-03-15T00:00:00Z')] == ['event-3']
+
+    def test_search_findings_limit(self, connection):
+        """Test search result limit"""
+        assert len(search_findings(connection, limit=2)) == 2
+
+    def test_search_findings_uses_indexes(self, connection):
+        """Test filtered searches are served by indexes rather than table scans"""
+        plan = connection.execute(
+            'EXPLAIN QUERY PLAN SELECT * FROM findings WHERE FindingSeverity = ? ORDER BY EventTime DESC',
+            ('HIGH',)
+        ).fetchall()
+
+        assert any('findings_severity' in row['detail'] for row in plan)
+
+
+class TestMain:
+    """Test the command line interface"""
+
+    @patch('snapshot.boto3.Session')
+    def test_main_sync_and_search(self, mock_session, tmp_path, sample_items, capsys):
+        """Test sync followed by a search against the same snapshot file"""
+        mock_session.return_value.client.return_value = mock_dynamodb_client(sample_items)
+        db = str(tmp_path / 'audit.db')
+
+        assert main(['--db', db, 'sync', '--region', 'us-east-1']) == 0
+        mock_session.assert_called_once_with(profile_name=None, region_name='us-east-1')
+        mock_session.return_value.client.assert_called_once_with('dynamodb')
+        assert json.loads(capsys.readouterr().out)['Synced'] == 3
+
+        assert main(['--db', db, 'search', 'bitcoin', '--json']) == 0
+        rows = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert [row['EventID'] for row in rows] == ['event-3']
+
+    @patch('snapshot.boto3.Session')
+    def test_main_sync_client_error(self, mock_session, tmp_path):
+        """Test sync returns a non-zero exit code on AWS errors"""
+        mock_client = MagicMock()
+        mock_client.get_paginator.return_value.paginate.side_effect = ClientError(
+            {'Error': {'Code': 'ResourceNotFoundException', 'Message': 'Table not found'}},
+            'Scan'
+        )
+        mock_session.return_value.client.return_value = mock_client
+
+        assert main(['--db', str(tmp_path / 'audit.db'), 'sync']) == 1
+
+    def test_main_search_invalid_query(self, tmp_path):
+        """Test malformed full-text queries return a non-zero exit code"""
+        assert main(['--db', str(tmp_path / 'audit.db'), 'search', '"unterminated']) == 1
@@ -0,0 +1,374 @@
+import argparse
+import asyncio
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import boto3
+from boto3.dynamodb.types import TypeSerializer
+from botocore.config import Config
+
+logger = logging.getLogger(__name__)
+
+FUNCTIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'functions')
+
+DEFAULT_GUARDDUTY_CONCURRENCY = 8
+DEFAULT_S3_CONCURRENCY = 32
+DEFAULT_DYNAMODB_CONCURRENCY = 16
+DEFAULT_QUEUE_SIZE = 100
+
+
+def load_function_app(name):
+    """Load a Lambda function's app.py; each function is its own SAM CodeUri, so not a package"""
+    path = os.path.join(FUNCTIONS_DIR, name, 'app.py')
+    spec = importlib.util.spec_from_file_location(f"{name.replace('-', '_')}_app", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+get_findings_app = load_function_app('guardduty-get-findings')
+list_detectors_app = load_function_app('guardduty-list-detectors')
+
+_serializer = TypeSerializer()
+
+
+class IngestError(Exception):
+    """Raised when an event cannot be ingested; mirrors the state machine Fail states"""
+
+
+def to_json(obj):
+    """Serialize an object body the way Step Functions does for S3 and DynamoDB payloads"""
+    return json.dumps(obj, separators=(',', ':'))
+
+
+def extract(event):
+    """Extract the state machine variables from a Security Hub Findings - Imported event"""
+    try:
+        finding = event['detail']['findings'][0]
+        status = finding['Workflow']['Status']
+        return {
+            'eventId': event['id'],
+            'eventTime': event['time'],
+            'securityHubArn': event['resources'][0],
+            'findingArn': finding['Id'],
+            'findingRegion': finding['Region'],
+            'findingType': finding['Types'][0],
+            'findingTitle': finding['Title'],
+            'findingDescription': finding['Description'],
+            'findingCreatedAt': finding['CreatedAt'],
+            'findingStatus': status,
+            'findingSeverity': finding['Severity']['Label'],
+            'findingNote': {} if status == 'NEW' else finding.get('Note', {}),
+            'findingHash': hashlib.sha256(event['resources'][0].encode('utf-8')).hexdigest(),
+        }
+    except (KeyError, IndexError, TypeError) as e:
+        raise IngestError(f"Could not load Finding ARN from Id field: {str(e)}")
+
+
+def build_item(variables, base_uri, security_hub_obj, guardduty_obj, guardduty_finding):
+    """Build the DynamoDB item written by the state machine's Prepare DynamoDB Item step"""
+    return {
+        'Id': {'S': variables['securityHubArn']},
+        'EventID': {'S': variables['eventId']},
+        'FindingHash': {'S': variables['findingHash']},
+        'SecurityHubObjVersionId': {'S': security_hub_obj['VersionId']},
+        'SecurityHubObjETag': {'S': security_hub_obj['ETag']},
+        'SecurityHubObjURI': {'S': f"{base_uri}/{variables['eventId']}.json"},
+        'GuardDutyObjVersionId': {'S': guardduty_obj['VersionId']},
+        'GuardDutyObjETag': {'S': guardduty_obj['ETag']},
+        'GuardDutyObjURI': {'S': f"{base_uri}/{guardduty_finding['Id']}.json"},
+        'GuardDutyObj': {'S': to_json(guardduty_finding)},
+        'EventTime': {'S': variables['eventTime']},
+        'FindingType': {'S': variables['findingType']},
+        'FindingTitle': {'S': variables['findingTitle']},
+        'FindingDescription': {'S': variables['findingDescription']},
+        'FindingCreatedAt': {'S': variables['findingCreatedAt']},
+        'FindingStatus': {'S': variables['findingStatus']},
+        'FindingSeverity': {'S': variables['findingSeverity']},
+        'FindingNote': _serializer.serialize(variables['findingNote']),
+        'FindingArn': {'S': variables['findingArn']},
+    }
+
+
+class IngestPipeline:
+    """Bounded-concurrency asyncio ingest of many findings within one process.
+
+    Each event goes through the same steps as the BlackBoxDuty state machine.
+    Blocking boto3 calls run on a thread pool. Per-service semaphores cap the
+    calls in flight to GuardDuty, S3 and DynamoDB. A bounded queue applies
+    backpressure to the event source.
+    """
+
+    def __init__(self, table_name, bucket_name, session=None,
+                 guardduty_concurrency=DEFAULT_GUARDDUTY_CONCURRENCY,
+                 s3_concurrency=DEFAULT_S3_CONCURRENCY,
+                 dynamodb_concurrency=DEFAULT_DYNAMODB_CONCURRENCY,
+                 queue_size=DEFAULT_QUEUE_SIZE):
+        self.table_name = table_name
+        self.bucket_name = bucket_name
+        self.session = session or boto3.Session()
+        self.limits = {
+            'guardduty': guardduty_concurrency,
+            's3': s3_concurrency,
+            'dynamodb': dynamodb_concurrency,
+        }
+        self.queue_size = queue_size
+        self.workers = max(self.limits.values())
+        self.s3_client = self._client('s3')
+        self.dynamodb_client = self._client('dynamodb')
+        self.guardduty_clients = {}
+        self.detector_ids = {}
+        self.semaphores = None
+        self.executor = None
+
+    def _setup(self):
+        # Semaphores and cached ListDetectors tasks bind to the running event loop, so they are per run.
+        self.detector_ids = {}
+        self.semaphores = {name: asyncio.Semaphore(limit) for name, limit in self.limits.items()}
+        self.executor = ThreadPoolExecutor(max_workers=sum(self.limits.values()))
+
+    def _teardown(self):
+        self.executor.shutdown(wait=True)
+        self.executor = None
+        self.semaphores = None
+
+    def _require_run(self):
+        if self.semaphores is None or self.executor is None:
+            raise RuntimeError('IngestPipeline events can only be ingested from within run()')
+
+    def _client(self, service_name, region_name=None):
+        config = Config(
+            max_pool_connections=self.limits[service_name],
+            retries={'mode': 'standard'}
+        )
+        return self.session.client(service_name, region_name=region_name, config=config)
+
+    def _guardduty_client(self, region):
+        if region not in self.guardduty_clients:
+            self.guardduty_clients[region] = self._client('guardduty', region)
+        return self.guardduty_clients[region]
+
+    async def _call(self, service_name, func, **kwargs):
+        self._require_run()
+        async with self.semaphores[service_name]:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, partial(func, **kwargs))
+
+    async def _list_detectors(self, region):
+        self._require_run()
+        async with self.semaphores['guardduty']:
+            return await list_detectors_app.lambda_handler_async(
+                {'FindingRegion': region},
+                guardduty_client=self._guardduty_client(region),
+                executor=self.executor
+            )
+
+    async def _detector_id(self, region):
+        # Detectors change rarely; one ListDetectors per region per run is shared by all its events.
+        if region not in self.detector_ids:
+            self.detector_ids[region] = asyncio.ensure_future(self._list_detectors(region))
+        task = self.detector_ids[region]
+        result = await task
+        if 'error' in result or not result['DetectorIds']:
+            if self.detector_ids.get(region) is task:
+                del self.detector_ids[region]
+            raise IngestError(f"Could not load GuardDuty detector Id: {result.get('message', 'no detectors')}")
+        return result['DetectorIds'][0]
+
+    async def _get_finding(self, variables, detector_id):
+        self._require_run()
+        finding_id = variables['findingArn'].split('/')[3]
+        async with self.semaphores['guardduty']:
+            result = await get_findings_app.lambda_handler_async(
+                {
+                    'DetectorId': detector_id,
+                    'FindingIds': [finding_id],
+                    'FindingRegion': variables['findingRegion']
+                },
+                guardduty_client=self._guardduty_client(variables['findingRegion']),
+                executor=self.executor
+            )
+        if 'error' in result or not result['Findings']:
+            raise IngestError(f"Could not get GuardDuty finding {finding_id}: {result.get('message', 'not found')}")
+        return result['Findings'][0]
+
+    def _put_object(self, key, body):
+        return self._call(
+            's3',
+            self.s3_client.put_object,
+            Bucket=self.bucket_name,
+            Key=key,
+            Body=to_json(body),
+            ContentType='application/json'
+        )
+
+    async def _ingest_event(self, line_number, event):
+        """Ingest a single event; returns Line, EventID, Id, FindingHash and Status, plus Error on failure"""
+        # Checked before the try so misuse raises instead of being reported as a FAILED event.
+        self._require_run()
+        result = {'Line': line_number, 'EventID': None, 'Id': None, 'FindingHash': None}
+        try:
+            if isinstance(event, Exception):
+                raise event
+            if not isinstance(event, dict):
+                raise IngestError('Event is not a JSON object')
+            result['EventID'] = event.get('id')
+
+            variables = extract(event)
+            result['Id'] = variables['securityHubArn']
+            result['FindingHash'] = variables['findingHash']
+
+            detector_id = await self._detector_id(variables['findingRegion'])
+            guardduty_finding = await self._get_finding(variables, detector_id)
+
+            security_hub_obj, guardduty_obj = await asyncio.gather(
+                self._put_object(f"{variables['findingHash']}/{variables['eventId']}.json",
+                                 event['detail']['findings'][0]),
+                self._put_object(f"{variables['findingHash']}/{guardduty_finding['Id']}.json",
+                                 guardduty_finding)
+            )
+
+            base_uri = f"s3://{self.bucket_name}/{variables['findingHash']}"
+            item = build_item(variables, base_uri, security_hub_obj, guardduty_obj, guardduty_finding)
+            await self._call('dynamodb', self.dynamodb_client.put_item, TableName=self.table_name, Item=item)
+
+            result['Status'] = 'SUCCEEDED'
+
+        except Exception as e:
+            logger.error(f"Failed to ingest event {result['EventID']} on line {line_number}: {str(e)}")
+            result['Status'] = 'FAILED'
+            result['Error'] = str(e)
+
+        return result
+
+    async def _worker(self, queue, on_result, summary):
+        while True:
+            line_number, event = await queue.get()
+            try:
+                result = await self._ingest_event(line_number, event)
+                summary['Succeeded' if result['Status'] == 'SUCCEEDED' else 'Failed'] += 1
+                if on_result:
+                    try:
+                        on_result(result)
+                    except Exception as e:
+                        # A reporting error (e.g. BrokenPipeError on stdout) must not stop the worker.
+                        logger.error(f"Failed to report result for event {result['EventID']} "
+                                     f"on line {line_number} ({result['Status']}): {str(e)}")
+            finally:
+                queue.task_done()
+
+    async def _feed(self, events, queue):
+        for line_number, event in events:
+            await queue.put((line_number, event))
+
+    async def _until(self, task, workers):
+        """Wait for task, raising if any worker stops first so a full queue cannot block forever"""
+        done, _ = await asyncio.wait([task, *workers], return_when=asyncio.FIRST_COMPLETED)
+        stopped = [worker for worker in workers if worker in done]
+        if stopped:
+            error = None if stopped[0].cancelled() else stopped[0].exception()
+            raise RuntimeError(f"Ingest worker stopped unexpectedly: {error}") from error
+
+    async def run(self, events, on_result=None):
+        """Ingest an iterable of (line_number, event) pairs.
+
+        ``on_result`` is called with each event's result as soon as that event
+        finishes, so results arrive in completion order and are not held in
+        memory; exceptions it raises are logged and do not stop the run. If
+        the event source raises, events already queued are still finished and
+        reported before the error propagates. If a worker stops or the run is
+        cancelled, the remaining work is cancelled.
+
+        Returns
+        ------
+            dict: Number of events that succeeded and failed
+        """
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        summary = {'Succeeded': 0, 'Failed': 0}
+
+        self._setup()
+        workers = [asyncio.ensure_future(self._worker(queue, on_result, summary)) for _ in range(self.workers)]
+        producer = asyncio.ensure_future(self._feed(events, queue))
+        drained = None
+        try:
+            await self._until(producer, workers)
+            drained = asyncio.ensure_future(queue.join())
+            await self._until(drained, workers)
+            producer.result()
+        finally:
+            tasks = [task for task in (producer, drained, *workers) if task is not None]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._teardown()
+
+        logger.info(f"Ingested {summary['Succeeded']} of {summary['Succeeded'] + summary['Failed']} events")
+        return summary
+
+
+def read_events(stream):
+    """Yield (line_number, event) pairs from a stream of JSON lines, skipping blank lines.
+
+    A line that is not valid JSON yields an IngestError in place of the event,
+    so it is reported as a failed result rather than stopping the batch.
+    """
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, IngestError(f"Invalid JSON on line {line_number}: {str(e)}")
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        description='Ingest Security Hub GuardDuty finding events into BlackBoxDuty with bounded concurrency.'
+    )
+    parser.add_argument('events', help='File of Security Hub Findings - Imported events as JSON lines, or - for stdin')
+    parser.add_argument('--table', default='BlackBoxDutyTable', help='BlackBoxDuty DynamoDB table name')
+    parser.add_argument('--bucket', required=True, help='BlackBoxDuty S3 bucket name')
+    parser.add_argument('--region', help='AWS region of the table and bucket')
+    parser.add_argument('--profile', help='AWS profile to use')
+    parser.add_argument('--guardduty-concurrency', type=int, default=DEFAULT_GUARDDUTY_CONCURRENCY)
+    parser.add_argument('--s3-concurrency', type=int, default=DEFAULT_S3_CONCURRENCY)
+    parser.add_argument('--dynamodb-concurrency', type=int, default=DEFAULT_DYNAMODB_CONCURRENCY)
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help='Maximum events read ahead of the workers')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s %(message)s')
+    args = parse_args(argv)
+
+    pipeline = IngestPipeline(
+        args.table,
+        args.bucket,
+        session=boto3.Session(profile_name=args.profile, region_name=args.region),
+        guardduty_concurrency=args.guardduty_concurrency,
+        s3_concurrency=args.s3_concurrency,
+        dynamodb_concurrency=args.dynamodb_concurrency,
+        queue_size=args.queue_size
+    )
+
+    def print_result(result):
+        print(json.dumps(result), flush=True)
+
+    stream = sys.stdin if args.events == '-' else open(args.events)
+    try:
+        summary = asyncio.run(pipeline.run(read_events(stream), on_result=print_result))
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+    return 0 if summary['Failed'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
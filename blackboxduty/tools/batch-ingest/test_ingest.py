@@ -0,0 +1,325 @@
+import asyncio
+import pytest
+from unittest.mock import patch, MagicMock
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime
+from botocore.exceptions import ClientError
+import sys
+import os
+
+# Add the current directory to Python path for imports
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ingest import IngestPipeline, IngestError, extract, read_events, main
+
+SECURITY_HUB_ARN = 'arn:aws:securityhub:us-east-1::product/aws/guardduty/arn:aws:guardduty:us-east-1:123456789012:detector/test-detector-123/finding/{}'
+FINDING_ARN = 'arn:aws:guardduty:us-east-1:123456789012:detector/test-detector-123/finding/{}'
+
+
+def make_event(index, status='NEW', region='us-east-1'):
+    """Build a Security Hub Findings - Imported event for a GuardDuty finding"""
+    finding_id = f'finding-{index}'
+    finding = {
+        'Id': FINDING_ARN.format(finding_id),
+        'Region': region,
+        'Types': ['TTPs/Discovery/Recon:EC2-PortProbeUnprotectedPort'],
+        'Title': 'Port scan detected',
+        'Description': 'Unprotected port being probed.',
+        'CreatedAt': '2025-01-01T00:00:00Z',
+        'Workflow': {'Status': status},
+        'Severity': {'Label': 'MEDIUM'},
+    }
+    if status != 'NEW':
+        finding['Note'] = {'Text': 'Investigated', 'UpdatedBy': 'analyst', 'UpdatedAt': '2025-01-02T00:00:00Z'}
+    return {
+        'id': f'event-{index}',
+        'time': '2025-01-01T00:00:05Z',
+        'resources': [SECURITY_HUB_ARN.format(finding_id)],
+        'detail': {'findings': [finding]},
+    }
+
+
+@pytest.fixture
+def clients():
+    """Fixture for mock GuardDuty, S3 and DynamoDB clients"""
+    guardduty = MagicMock()
+    guardduty.list_detectors.return_value = {'DetectorIds': ['test-detector-123']}
+    guardduty.get_findings.side_effect = lambda DetectorId, FindingIds: {
+        'Findings': [{'Id': FindingIds[0], 'Severity': 5.0, 'CreatedAt': datetime(2025, 1, 1, 0, 0, 0)}]
+    }
+    s3 = MagicMock()
+    s3.put_object.side_effect = lambda **kwargs: {'VersionId': f"v-{kwargs['Key']}", 'ETag': '"etag"'}
+    dynamodb = MagicMock()
+    return {'guardduty': guardduty, 's3': s3, 'dynamodb': dynamodb}
+
+
+@pytest.fixture
+def session(clients):
+    """Fixture for a mock boto3 session returning the mock clients"""
+    session = MagicMock()
+    session.client.side_effect = lambda service_name, **kwargs: clients[service_name]
+    return session
+
+
+def run_pipeline(session, events, **kwargs):
+    """Run the pipeline over events numbered from line 1, returning results in line order"""
+    pipeline = IngestPipeline('BlackBoxDutyTable', 'blackboxduty-bucket', session=session, **kwargs)
+    results = []
+    asyncio.run(pipeline.run(enumerate(events, start=1), on_result=results.append))
+    return sorted(results, key=lambda result: result['Line'])
+
+
+class TestExtract:
+    """Test event extraction"""
+
+    def test_extract_new_finding(self):
+        """Test extraction of a NEW finding drops any note"""
+        variables = extract(make_event(1))
+
+        assert variables['eventId'] == 'event-1'
+        assert variables['findingNote'] == {}
+        assert variables['findingHash'] == hashlib.sha256(SECURITY_HUB_ARN.format('finding-1').encode()).hexdigest()
+
+    def test_extract_finding_with_note(self):
+        """Test extraction keeps the note for findings that are not NEW"""
+        variables = extract(make_event(1, status='NOTIFIED'))
+
+        assert variables['findingNote']['Text'] == 'Investigated'
+
+    def test_extract_missing_finding(self):
+        """Test extraction of an event without findings"""
+        with pytest.raises(IngestError):
+            extract({'id': 'event-1', 'detail': {'findings': []}})
+
+
+class TestIngestPipeline:
+    """Test the async ingest pipeline"""
+
+    def test_ingest_writes_state_machine_output(self, session, clients):
+        """Test S3 objects and the DynamoDB item match the state machine"""
+        event = make_event(1, status='NOTIFIED')
+        finding_hash = extract(event)['findingHash']
+
+        results = run_pipeline(session, [event])
+
+        assert results == [{
+            'Line': 1,
+            'EventID': 'event-1',
+            'Id': SECURITY_HUB_ARN.format('finding-1'),
+            'FindingHash': finding_hash,
+            'Status': 'SUCCEEDED',
+        }]
+        clients['guardduty'].get_findings.assert_called_once_with(
+            DetectorId='test-detector-123',
+            FindingIds=['finding-1']
+        )
+        puts = {call.kwargs['Key']: call.kwargs for call in clients['s3'].put_object.call_args_list}
+        assert json.loads(puts[f'{finding_hash}/event-1.json']['Body']) == event['detail']['findings'][0]
+        assert json.loads(puts[f'{finding_hash}/finding-1.json']['Body']) == {
+            'Id': 'finding-1', 'Severity': 5.0, 'CreatedAt': '2025-01-01T00:00:00'
+        }
+
+        clients['dynamodb'].put_item.assert_called_once()
+        put_item = clients['dynamodb'].put_item.call_args.kwargs
+        assert put_item['TableName'] == 'BlackBoxDutyTable'
+        item = put_item['Item']
+        assert item['Id'] == {'S': SECURITY_HUB_ARN.format('finding-1')}
+        assert item['SecurityHubObjURI'] == {'S': f's3://blackboxduty-bucket/{finding_hash}/event-1.json'}
+        assert item['SecurityHubObjVersionId'] == {'S': f'v-{finding_hash}/event-1.json'}
+        assert item['GuardDutyObjURI'] == {'S': f's3://blackboxduty-bucket/{finding_hash}/finding-1.json'}
+        assert item['GuardDutyObj'] == {'S': '{"Id":"finding-1","Severity":5.0,"CreatedAt":"2025-01-01T00:00:00"}'}
+        assert item['FindingNote']['M']['Text'] == {'S': 'Investigated'}
+        assert item['FindingSeverity'] == {'S': 'MEDIUM'}
+
+    def test_ingest_reports_every_event(self, session):
+        """Test one result is reported per event with its line number"""
+        results = run_pipeline(session, (make_event(i) for i in range(25)))
+
+        assert [(result['Line'], result['EventID']) for result in results] == [(i + 1, f'event-{i}') for i in range(25)]
+        assert all(result['Status'] == 'SUCCEEDED' for result in results)
+
+    def test_ingest_lists_detectors_once_per_region(self, session, clients):
+        """Test ListDetectors is shared by all events in a region"""
+        events = [make_event(i, region=region) for i in range(10) for region in ('us-east-1', 'eu-west-1')]
+
+        run_pipeline(session, events)
+
+        assert clients['guardduty'].list_detectors.call_count == 2
+
+    def test_ingest_respects_service_concurrency(self, session, clients):
+        """Test S3 calls overlap but never exceed the S3 concurrency limit"""
+        lock = threading.Lock()
+        in_flight = {'current': 0, 'max': 0}
+
+        def put_object(**kwargs):
+            with lock:
+                in_flight['current'] += 1
+                in_flight['max'] = max(in_flight['max'], in_flight['current'])
+            time.sleep(0.01)
+            with lock:
+                in_flight['current'] -= 1
+            return {'VersionId': 'v', 'ETag': '"etag"'}
+
+        clients['s3'].put_object.side_effect = put_object
+
+        run_pipeline(session, [make_event(i) for i in range(20)], s3_concurrency=3, queue_size=2)
+
+        assert in_flight['max'] == 3
+
+    def test_ingest_get_findings_error(self, session, clients):
+        """Test a GuardDuty error fails only that event and skips its writes"""
+        clients['guardduty'].get_findings.side_effect = ClientError(
+            {'Error': {'Code': 'BadRequestException', 'Message': 'The request is rejected'}},
+            'GetFindings'
+        )
+
+        results = run_pipeline(session, [make_event(1)])
+
+        assert results[0]['Status'] == 'FAILED'
+        assert 'The request is rejected' in results[0]['Error']
+        clients['s3'].put_object.assert_not_called()
+        clients['dynamodb'].put_item.assert_not_called()
+
+    def test_ingest_no_detectors(self, session, clients):
+        """Test events fail when the region has no detector"""
+        clients['guardduty'].list_detectors.return_value = {'DetectorIds': []}
+
+        results = run_pipeline(session, [make_event(1), make_event(2)])
+
+        assert [result['Status'] for result in results] == ['FAILED', 'FAILED']
+        clients['guardduty'].get_findings.assert_not_called()
+
+    def test_ingest_invalid_event(self, session, clients):
+        """Test an unparseable event fails without stopping the batch"""
+        results = run_pipeline(session, [{'id': 'bad-event'}, make_event(1)])
+
+        assert [result['Status'] for result in results] == ['FAILED', 'SUCCEEDED']
+        assert clients['dynamodb'].put_item.call_count == 1
+
+    def test_ingest_non_object_event(self, session, clients):
+        """Test a JSON value that is not an object fails without stopping the batch"""
+        results = run_pipeline(session, [[1, 2], make_event(1)])
+
+        assert [result['Status'] for result in results] == ['FAILED', 'SUCCEEDED']
+
+    def test_ingest_event_outside_run(self, session, clients):
+        """Test ingesting an event outside run() raises instead of reporting a FAILED event"""
+        pipeline = IngestPipeline('BlackBoxDutyTable', 'blackboxduty-bucket', session=session)
+
+        with pytest.raises(RuntimeError, match='within run'):
+            asyncio.run(pipeline._ingest_event(1, make_event(1)))
+
+        clients['guardduty'].get_findings.assert_not_called()
+
+    def test_ingest_reports_completed_events_when_source_fails(self, session, clients):
+        """Test events already queued are finished and reported before a source error propagates"""
+        def events():
+            for i in range(5):
+                yield i + 1, make_event(i)
+            raise OSError('Input stream closed')
+
+        pipeline = IngestPipeline('BlackBoxDutyTable', 'blackboxduty-bucket', session=session, queue_size=1)
+        results = []
+
+        with pytest.raises(OSError):
+            asyncio.run(pipeline.run(events(), on_result=results.append))
+
+        assert sorted(result['Line'] for result in results) == [1, 2, 3, 4, 5]
+        assert clients['dynamodb'].put_item.call_count == 5
+
+    def test_ingest_on_result_error_does_not_hang(self, session, clients):
+        """Test a failing on_result callback is logged and the run still completes"""
+        def on_result(result):
+            raise BrokenPipeError('Broken pipe')
+
+        pipeline = IngestPipeline('BlackBoxDutyTable', 'blackboxduty-bucket', session=session, queue_size=2)
+        events = enumerate((make_event(i) for i in range(50)), start=1)
+
+        summary = asyncio.run(asyncio.wait_for(pipeline.run(events, on_result=on_result), 5))
+
+        assert summary == {'Succeeded': 50, 'Failed': 0}
+        assert clients['dynamodb'].put_item.call_count == 50
+
+    def test_ingest_worker_failure_does_not_hang(self, session):
+        """Test run raises instead of blocking on a full queue when every worker stops"""
+        pipeline = IngestPipeline('BlackBoxDutyTable', 'blackboxduty-bucket', session=session,
+                                  guardduty_concurrency=1, s3_concurrency=1, dynamodb_concurrency=1, queue_size=1)
+
+        async def ingest_event(line_number, event):
+            raise RuntimeError('Worker crashed')
+
+        pipeline._ingest_event = ingest_event
+        events = enumerate((make_event(i) for i in range(50)), start=1)
+
+        with pytest.raises(RuntimeError, match='Ingest worker stopped unexpectedly'):
+            asyncio.run(asyncio.wait_for(pipeline.run(events), 5))
+
+    def test_ingest_cancelled_run_does_not_hang(self, session, clients):
+        """Test cancelling a run stops it promptly and releases the executor"""
+        clients['s3'].put_object.side_effect = lambda **kwargs: time.sleep(0.05) or {'VersionId': 'v', 'ETag': '"etag"'}
+        pipeline = IngestPipeline('BlackBoxDutyTable', 'blackboxduty-bucket', session=session, queue_size=2)
+        events = enumerate((make_event(i) for i in range(1000)), start=1)
+
+        with pytest.raises(asyncio.TimeoutError):
+            asyncio.run(asyncio.wait_for(pipeline.run(events), 0.2))
+
+        assert pipeline.executor is None
+        assert clients['dynamodb'].put_item.call_count < 1000
+
+
+class TestReadEvents:
+    """Test event input parsing"""
+
+    def test_read_events_skips_blank_lines(self):
+        """Test JSON lines parsing keeps the line number of each event"""
+        lines = [json.dumps(make_event(1)) + '\n', '\n', json.dumps(make_event(2)) + '\n']
+
+        assert [(line, event['id']) for line, event in read_events(lines)] == [(1, 'event-1'), (3, 'event-2')]
+
+    def test_read_events_invalid_line(self):
+        """Test an invalid line yields an IngestError instead of raising"""
+        lines = [json.dumps(make_event(1)) + '\n', '{not json\n', json.dumps(make_event(2)) + '\n']
+
+        parsed = list(read_events(lines))
+
+        assert [line for line, _ in parsed] == [1, 2, 3]
+        assert isinstance(parsed[1][1], IngestError)
+        assert 'line 2' in str(parsed[1][1])
+
+
+class TestMain:
+    """Test the command line interface"""
+
+    @patch('ingest.boto3.Session')
+    def test_main_bad_line_partway(self, mock_session, session, clients, tmp_path, capsys):
+        """Test a malformed line is reported as FAILED while every other event is ingested and reported"""
+        mock_session.return_value = session
+        lines = [json.dumps(make_event(i)) for i in range(30)]
+        lines.insert(15, '{"id": "truncated')
+        events_file = tmp_path / 'events.jsonl'
+        events_file.write_text('\n'.join(lines) + '\n')
+
+        exit_code = main([str(events_file), '--bucket', 'blackboxduty-bucket', '--queue-size', '4'])
+
+        results = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        assert exit_code == 1
+        assert len(results) == 31
+        failed = [result for result in results if result['Status'] == 'FAILED']
+        assert [result['Line'] for result in failed] == [16]
+        assert 'Invalid JSON on line 16' in failed[0]['Error']
+        assert sorted(result['EventID'] for result in results if result['Status'] == 'SUCCEEDED') == \
+            sorted(f'event-{i}' for i in range(30))
+        assert clients['dynamodb'].put_item.call_count == 30
+
+    @patch('ingest.boto3.Session')
+    def test_main_success(self, mock_session, session, tmp_path, capsys):
+        """Test exit code is zero when every event succeeds"""
+        mock_session.return_value = session
+        events_file = tmp_path / 'events.jsonl'
+        events_file.write_text(json.dumps(make_event(1)) + '\n')
+
+        assert main([str(events_file), '--bucket', 'blackboxduty-bucket']) == 0
+        assert json.loads(capsys.readouterr().out)['Status'] == 'SUCCEEDED'